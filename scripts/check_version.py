@@ -5,52 +5,59 @@ Sets GitHub Actions outputs for use in subsequent steps.
 """
 
 import requests
-import re
 import os
 import sys
 
+from pypi_client import cache_path, get_json
+
+PYPI_CACHE_NAME = 'pypi.json'
+
 def get_current_version():
     """Extract current version from PKGBUILD."""
     try:
         with open('PKGBUILD', 'r') as f:
-            pkgbuild_content = f.read()
+            for line in f:
+                if line.startswith('pkgver='):
+                    return line[len('pkgver='):].rstrip()
         
-        current_version_match = re.search(r'pkgver=(.+)', pkgbuild_content)
-        if not current_version_match:
-            print("ERROR: Could not find current version in PKGBUILD")
-            return None
-            
-        return current_version_match.group(1)
+        print("ERROR: Could not find current version in PKGBUILD")
+        return None
     except FileNotFoundError:
         print("ERROR: PKGBUILD file not found")
         return None
 
 def get_latest_version():
-    """Get latest version from PyPI."""
+    """Get the latest release JSON from PyPI."""
     try:
-        response = requests.get('https://pypi.org/pypi/awscli-local/json')
-        response.raise_for_status()
-        return response.json()['info']['version']
-    except requests.RequestException as e:
+        return get_json('https://pypi.org/pypi/awscli-local/json', cache_name=PYPI_CACHE_NAME)
+    except (requests.RequestException, ValueError) as e:
         print(f"ERROR: Failed to fetch version from PyPI: {e}")
         return None
 
+_github_outputs = {}
+
 def set_github_output(key, value):
-    """Set GitHub Actions output."""
+    """Queue a GitHub Actions output, written by flush_github_outputs."""
+    _github_outputs[key] = value
+    print(f"Output: {key}={value}")
+
+def flush_github_outputs():
+    """Write all queued GitHub Actions outputs in a single append."""
     github_output = os.environ.get('GITHUB_OUTPUT')
-    if github_output:
+    if github_output and _github_outputs:
         with open(github_output, 'a') as f:
-            f.write(f"{key}={value}\n")
-    print(f"Output: {key}={value}")
+            f.write(''.join(f"{key}={value}\n" for key, value in _github_outputs.items()))
+    _github_outputs.clear()
 
 def main():
     current_version = get_current_version()
     if not current_version:
         sys.exit(1)
         
-    latest_version = get_latest_version()
-    if not latest_version:
+    latest_info = get_latest_version()
+    if not latest_info:
         sys.exit(1)
+    latest_version = latest_info['info']['version']
     
     print(f"Current version: {current_version}")
     print(f"Latest version: {latest_version}")
@@ -62,6 +69,8 @@ def main():
     set_github_output("current_version", current_version)
     set_github_output("latest_version", latest_version)
     set_github_output("needs_update", "true" if needs_update else "false")
+    set_github_output("info_json", cache_path(PYPI_CACHE_NAME))
+    flush_github_outputs()
     
     if needs_update:
         print(f"✓ Update available: {current_version} → {latest_version}")
@@ -1,12 +1,45 @@
 #!/usr/bin/env python3
 """
 Generate .SRCINFO file from PKGBUILD.
-This is a simplified version that handles the basic PKGBUILD format.
+Uses `makepkg --printsrcinfo` when available, otherwise falls back to a
+simplified parser that handles the basic PKGBUILD format.
 """
 
 import re
+import shutil
+import subprocess
 import sys
 
+_LINE_RE = re.compile(r'''^(?P<key>\w+)=(?P<val>\([^)]*\)|"[^"]*"|'[^']*'|\S+)''', re.M)
+_ARRAY_ITEM_RE = re.compile(r"'([^']+)'|\"([^\"]+)\"|([^\s'\"]+)")
+
+_REQUIRED_FIELDS = ('pkgname', 'pkgver', 'pkgrel', 'pkgdesc', 'url')
+_ARRAY_FIELDS = ('arch', 'license', 'depends', 'makedepends')
+
+def _tokenize(content):
+    """Yield (key, raw value) pairs for top-level assignments in one pass."""
+    for m in _LINE_RE.finditer(content):
+        yield m.group('key'), m.group('val')
+
+def _parse_scalar(value):
+    """Strip surrounding quotes from a scalar assignment value."""
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        return value[1:-1]
+    return value
+
+def _parse_array(value):
+    """Split a bash array assignment value into its elements."""
+    if not value.startswith('('):
+        return []
+    # Parse array elements - handle both 'quoted' and unquoted items
+    items = []
+    for item in _ARRAY_ITEM_RE.findall(value[1:-1]):
+        # item is a tuple, get the non-empty group
+        item_value = next(filter(None, item), None)
+        if item_value:
+            items.append(item_value)
+    return items
+
 def parse_pkgbuild():
     """Parse PKGBUILD and extract key information."""
     try:
@@ -16,62 +49,28 @@ def parse_pkgbuild():
         print("ERROR: PKGBUILD file not found")
         return None
     
-    def extract_field(pattern, required=True):
-        match = re.search(pattern, content)
-        if match:
-            return match.group(1)
-        elif required:
-            print(f"ERROR: Could not find required field: {pattern}")
-            return None
-        return ""
-    
-    def extract_array(pattern):
-        match = re.search(pattern, content)
-        if match:
-            array_content = match.group(1)
-            # Parse array elements - handle both 'quoted' and unquoted items
-            items = []
-            for item in re.findall(r"'([^']+)'|\"([^\"]+)\"|([^\s'\"]+)", array_content):
-                # item is a tuple, get the non-empty group
-                value = next(filter(None, item), None)
-                if value:
-                    items.append(value)
-            return items
-        return []
+    fields = dict(_tokenize(content))
     
     # Extract basic fields
-    pkgname = extract_field(r'pkgname=([^\s]+)')
-    pkgver = extract_field(r'pkgver=([^\s]+)')
-    pkgrel = extract_field(r'pkgrel=([^\s]+)')
-    pkgdesc = extract_field(r'pkgdesc="([^"]+)"')
-    url = extract_field(r'url="([^"]+)"')
-    
-    if not all([pkgname, pkgver, pkgrel, pkgdesc, url]):
-        return None
+    pkg_info = {}
+    for key in _REQUIRED_FIELDS:
+        value = _parse_scalar(fields.get(key, ''))
+        if not value:
+            print(f"ERROR: Could not find required field: {key}")
+            return None
+        pkg_info[key] = value
     
     # Extract arrays
-    arch = extract_array(r"arch=\(([^)]+)\)")
-    license_arr = extract_array(r"license=\(([^)]+)\)")
-    depends = extract_array(r"depends=\(([^)]+)\)")
-    makedepends = extract_array(r"makedepends=\(([^)]+)\)")
+    for key in _ARRAY_FIELDS:
+        pkg_info[key] = _parse_array(fields.get(key, ''))
     
     # Set defaults
-    if not arch:
-        arch = ['any']
-    if not license_arr:
-        license_arr = ['unknown']
-    
-    return {
-        'pkgname': pkgname,
-        'pkgver': pkgver,
-        'pkgrel': pkgrel,
-        'pkgdesc': pkgdesc,
-        'url': url,
-        'arch': arch,
-        'license': license_arr,
-        'depends': depends,
-        'makedepends': makedepends
-    }
+    if not pkg_info['arch']:
+        pkg_info['arch'] = ['any']
+    if not pkg_info['license']:
+        pkg_info['license'] = ['unknown']
+    
+    return pkg_info
 
 def generate_srcinfo(pkg_info):
     """Generate .SRCINFO content from parsed PKGBUILD info."""
@@ -103,16 +102,38 @@ def generate_srcinfo(pkg_info):
     
     return '\n'.join(lines) + '\n'
 
+def generate_srcinfo_with_makepkg():
+    """Generate .SRCINFO content with makepkg, or None if it is unavailable."""
+    if not shutil.which('makepkg'):
+        return None
+    
+    try:
+        result = subprocess.run(['makepkg', '--printsrcinfo'],
+                                capture_output=True, text=True, check=True)
+        return result.stdout
+    except subprocess.CalledProcessError as e:
+        print(f"WARNING: makepkg --printsrcinfo failed, using built-in parser: {e}")
+        if e.stderr:
+            print(e.stderr.rstrip())
+        return None
+    except OSError as e:
+        print(f"WARNING: makepkg --printsrcinfo failed, using built-in parser: {e}")
+        return None
+
 def main():
     print("Generating .SRCINFO from PKGBUILD...")
     
-    # Parse PKGBUILD
-    pkg_info = parse_pkgbuild()
-    if not pkg_info:
-        sys.exit(1)
-    
-    # Generate .SRCINFO content
-    srcinfo_content = generate_srcinfo(pkg_info)
+    # Prefer makepkg, which sources the PKGBUILD with bash itself
+    srcinfo_content = generate_srcinfo_with_makepkg()
+    
+    if srcinfo_content is None:
+        # Parse PKGBUILD
+        pkg_info = parse_pkgbuild()
+        if not pkg_info:
+            sys.exit(1)
+        
+        # Generate .SRCINFO content
+        srcinfo_content = generate_srcinfo(pkg_info)
     
     # Write .SRCINFO file
     try:
@@ -0,0 +1,115 @@
+"""
+Shared HTTP session for talking to PyPI from the update scripts.
+Reuses connections and retry settings across every request in a run, and
+caches JSON responses on disk so repeat runs can use conditional GETs.
+"""
+
+import json
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+USER_AGENT = 'awscli-local-pkgbuild-bot'
+# (connect, read) timeouts in seconds
+TIMEOUT = (3.05, 15)
+RETRY_STATUSES = (429, 502, 503, 504)
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'awscli-local-bot')
+
+def create_session():
+    """Create a requests session with connection pooling and retries."""
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    # requests already sends Accept-Encoding (gzip, plus br with brotli installed)
+    
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=RETRY_STATUSES)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+SESSION = create_session()
+
+def load_json_file(path):
+    """Parse a JSON file straight from its bytes."""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+def cache_path(cache_name):
+    """Return the on-disk location of a cached response body."""
+    return os.path.join(CACHE_DIR, cache_name)
+
+def _read_cache(cache_name):
+    """Return (body path, validators) for a cached response, if any."""
+    body_path = cache_path(cache_name)
+    try:
+        validators = load_json_file(body_path + '.headers')
+    except (OSError, ValueError):
+        validators = {}
+    # Ignore a corrupt headers file or one left without its body
+    if not isinstance(validators, dict) or not os.path.exists(body_path):
+        validators = {}
+    return body_path, validators
+
+def _write_cache(body_path, response):
+    """Store a response body and its validators for the next run."""
+    validators = {}
+    if 'ETag' in response.headers:
+        validators['If-None-Match'] = response.headers['ETag']
+    if 'Last-Modified' in response.headers:
+        validators['If-Modified-Since'] = response.headers['Last-Modified']
+    
+    headers_path = body_path + '.headers'
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(body_path + '.tmp', 'wb') as f:
+            f.write(response.content)
+        if validators:
+            with open(headers_path + '.tmp', 'w') as f:
+                json.dump(validators, f)
+        
+        # Drop the old validators first so they never describe a newer body
+        try:
+            os.remove(headers_path)
+        except FileNotFoundError:
+            pass
+        os.replace(body_path + '.tmp', body_path)
+        if validators:
+            os.replace(headers_path + '.tmp', headers_path)
+    except OSError as e:
+        print(f"WARNING: Failed to write cache {body_path}: {e}")
+
+def get_json(url, cache_name=None):
+    """
+    GET a JSON document. When cache_name is given the previous response is
+    revalidated with If-None-Match/If-Modified-Since and reused on a 304.
+    Raises requests.RequestException on failure, or ValueError if the body
+    is not valid JSON.
+    """
+    if not cache_name:
+        response = SESSION.get(url, timeout=TIMEOUT)
+        response.raise_for_status()
+        return json_loads(response.content)
+    
+    body_path, validators = _read_cache(cache_name)
+    response = SESSION.get(url, headers=validators, timeout=TIMEOUT)
+    if response.status_code == 304:
+        try:
+            return load_json_file(body_path)
+        except (OSError, ValueError):
+            # Cache vanished or is corrupt, fetch unconditionally
+            response = SESSION.get(url, timeout=TIMEOUT)
+    
+    response.raise_for_status()
+    data = json_loads(response.content)
+    _write_cache(body_path, response)
+    return data
@@ -1,23 +1,46 @@
 #!/usr/bin/env python3
 """
 Update PKGBUILD with new version, source URL, and SHA256 checksum.
-Downloads and verifies the package from PyPI.
+Optionally downloads the package from PyPI to verify its checksum.
 """
 
 import requests
-import re
+import urllib3
 import hashlib
 import sys
 import argparse
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-def get_package_info(version):
-    """Get package information from PyPI."""
+from pypi_client import SESSION, TIMEOUT, cache_path, get_json, load_json_file
+
+CHUNK_SIZE = 64 * 1024
+
+PYPI_PACKAGES_URL = 'https://files.pythonhosted.org/packages/'
+
+def load_info_json(path, version):
+    """Load release files from a saved PyPI JSON document, if it matches version."""
     try:
-        response = requests.get(f'https://pypi.org/pypi/awscli-local/{version}/json')
-        response.raise_for_status()
+        data = load_json_file(path)
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Could not read {path}, fetching from PyPI: {e}")
+        return None
+    
+    if data.get('info', {}).get('version') != version:
+        print(f"WARNING: {path} does not describe version {version}, fetching from PyPI")
+        return None
+    return data['urls']
+
+def fetch_package_info(version, info_json=None):
+    """Get package information from PyPI, or from a saved PyPI JSON document."""
+    try:
+        files = load_info_json(info_json, version) if info_json else None
+        if files is None:
+            files = get_json(f'https://pypi.org/pypi/awscli-local/{version}/json')['urls']
         
         # Find the source tarball
-        files = response.json()['urls']
         source_file = None
         for file_info in files:
             if file_info['packagetype'] == 'sdist':
@@ -32,18 +55,69 @@ def get_package_info(version):
             'url': source_file['url'],
             'sha256': source_file['digests']['sha256']
         }
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError) as e:
         print(f"ERROR: Failed to get package info from PyPI: {e}")
         return None
 
+def load_cached_package_info(version):
+    """Load package information saved by a previous run, if any."""
+    try:
+        package_info = load_json_file(cache_path(f'pkginfo-{version}.json'))
+    except (OSError, ValueError):
+        return None
+    
+    # Ignore truncated or outdated entries and fetch again
+    if not isinstance(package_info, dict) or not {'url', 'sha256'} <= package_info.keys():
+        return None
+    return package_info
+
+def save_cached_package_info(version, package_info):
+    """Atomically save package information for later runs."""
+    path = cache_path(f'pkginfo-{version}.json')
+    tmp_path = path + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump(package_info, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"WARNING: Failed to cache package info: {e}")
+
+@functools.lru_cache(maxsize=32)
+def get_package_info(version, info_json=None):
+    """
+    Get package information for a version. Published releases never change,
+    so results are cached on disk and reused by later runs.
+    """
+    package_info = load_cached_package_info(version)
+    if package_info:
+        print(f"Using cached package info for {version}")
+        return package_info
+    
+    package_info = fetch_package_info(version, info_json)
+    if package_info:
+        save_cached_package_info(version, package_info)
+    return package_info
+
+def stream_sha256(response):
+    """Hash a streamed response body without buffering it in memory."""
+    if hasattr(hashlib, 'file_digest'):
+        # Python 3.11+ hashes in C from a reusable buffer
+        response.raw.decode_content = True
+        return hashlib.file_digest(response.raw, 'sha256').hexdigest()
+    
+    sha256 = hashlib.sha256()
+    for chunk in response.iter_content(CHUNK_SIZE):
+        sha256.update(chunk)
+    return sha256.hexdigest()
+
 def verify_checksum(url, expected_sha256):
     """Download package and verify its checksum."""
     print("Downloading package to verify checksum...")
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        calculated_sha256 = hashlib.sha256(response.content).hexdigest()
+        with SESSION.get(url, stream=True, timeout=TIMEOUT) as response:
+            response.raise_for_status()
+            calculated_sha256 = stream_sha256(response)
         
         if expected_sha256 != calculated_sha256:
             print(f"ERROR: Checksum mismatch!")
@@ -54,57 +128,87 @@ def verify_checksum(url, expected_sha256):
             print("✓ Checksum verification passed")
             return True
             
-    except requests.RequestException as e:
+    except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
         print(f"ERROR: Failed to download package for verification: {e}")
         return False
 
-def update_pkgbuild(version, package_info):
-    """Update PKGBUILD with new version and package information."""
+def read_pkgbuild():
+    """Read PKGBUILD, or None if it is missing."""
     try:
         with open('PKGBUILD', 'r') as f:
-            content = f.read()
+            return f.read()
     except FileNotFoundError:
         print("ERROR: PKGBUILD file not found")
-        return False
+        return None
+
+def find_field(content, key):
+    """Return the (start, end) span of a top-level assignment, or None."""
+    if content.startswith(key + '='):
+        start = 0
+    else:
+        start = content.find('\n' + key + '=')
+        if start < 0:
+            return None
+        start += 1
     
+    value_start = start + len(key) + 1
+    if content.startswith('(', value_start):
+        # Arrays may span several lines, so end after the closing paren
+        end = content.find(')', value_start)
+        end = len(content) if end < 0 else end + 1
+    else:
+        end = content.find('\n', value_start)
+        end = len(content) if end < 0 else end
+    return start, end
+
+def replace_field(content, key, new_value):
+    """Replace a top-level assignment, leaving content unchanged if it is missing."""
+    span = find_field(content, key)
+    if not span:
+        return content
+    start, end = span
+    return content[:start] + new_value + content[end:]
+
+def render_pkgbuild(content, version, package_info):
+    """Return PKGBUILD content updated with new version and package information."""
     # Update version
-    content = re.sub(r'pkgver=.+', f'pkgver={version}', content)
+    content = replace_field(content, 'pkgver', f'pkgver={version}')
     
     # Reset pkgrel to 1 for new version
-    content = re.sub(r'pkgrel=.+', 'pkgrel=1', content)
+    content = replace_field(content, 'pkgrel', 'pkgrel=1')
     
     # Update source URL - handle the PyPI URL pattern
-    download_url = package_info['url']
-    if 'source=(' in content:
-        # Extract just the filename part after packages/ for the URL
-        url_suffix = download_url.split('packages/')[-1]
-        content = re.sub(
-            r'(source=\([^)]*https://files\.pythonhosted\.org/packages/)[^")]+([^)]*\))',
-            lambda m: m.group(1) + url_suffix + m.group(2),
-            content
-        )
+    source_span = find_field(content, 'source')
+    if source_span:
+        start, end = source_span
+        url_start = content.find(PYPI_PACKAGES_URL, start, end)
+        if url_start >= 0:
+            url_start += len(PYPI_PACKAGES_URL)
+            url_end = content.find('"', url_start, end)
+            if url_end < 0:
+                # Unquoted URL, stop before the closing paren
+                url_end = end - 1
+            # Extract just the filename part after packages/ for the URL
+            url_suffix = package_info['url'].split('packages/')[-1]
+            content = content[:url_start] + url_suffix + content[url_end:]
+            # Shift the span end so the source array can be reused below
+            source_span = (start, end + len(url_suffix) - (url_end - url_start))
     
     # Update sha256sum
-    sha256_hash = package_info['sha256']
-    if "sha256sums=('SKIP')" in content:
-        content = re.sub(r"sha256sums=\('SKIP'\)", f"sha256sums=('{sha256_hash}')", content)
-    elif 'sha256sums=(' in content:
-        # Replace existing checksum
-        content = re.sub(
-            r"sha256sums=\('[^']*'\)",
-            f"sha256sums=('{sha256_hash}')",
-            content
-        )
-    else:
-        # Add sha256sums if it doesn't exist
-        source_line = re.search(r'source=\([^)]+\)', content)
-        if source_line:
-            insert_pos = source_line.end()
-            content = (content[:insert_pos] + 
-                      f"\nsha256sums=('{sha256_hash}')" + 
-                      content[insert_pos:])
-    
-    # Write updated PKGBUILD
+    sha256_line = f"sha256sums=('{package_info['sha256']}')"
+    sha256_span = find_field(content, 'sha256sums')
+    if sha256_span:
+        start, end = sha256_span
+        content = content[:start] + sha256_line + content[end:]
+    elif source_span:
+        # Add sha256sums after the source array if it doesn't exist
+        insert_pos = source_span[1]
+        content = content[:insert_pos] + '\n' + sha256_line + content[insert_pos:]
+    
+    return content
+
+def write_pkgbuild(content):
+    """Write updated PKGBUILD content."""
     try:
         with open('PKGBUILD', 'w') as f:
             f.write(content)
@@ -118,29 +222,47 @@ def main():
     parser = argparse.ArgumentParser(description='Update PKGBUILD with new version from PyPI')
     parser.add_argument('version', help='New version to update to')
     parser.add_argument('--verify', action='store_true', 
-                       help='Download and verify package checksum (default: True)', default=True)
+                       help='Download and verify package checksum (default: False)', default=False)
     parser.add_argument('--no-verify', dest='verify', action='store_false',
-                       help='Skip checksum verification')
+                       help='Skip checksum verification and trust the PyPI digest')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Fetch and verify package information without writing PKGBUILD')
+    parser.add_argument('--info-json', metavar='PATH',
+                       help='PyPI JSON saved by check_version.py, used instead of fetching it again')
     
     args = parser.parse_args()
     
     print(f"Updating PKGBUILD to version {args.version}")
     
     # Get package information from PyPI
-    package_info = get_package_info(args.version)
+    package_info = get_package_info(args.version, args.info_json)
     if not package_info:
         sys.exit(1)
     
     print(f"Download URL: {package_info['url']}")
     print(f"SHA256: {package_info['sha256']}")
     
-    # Verify checksum if requested
-    if args.verify:
-        if not verify_checksum(package_info['url'], package_info['sha256']):
+    content = read_pkgbuild()
+    if content is None:
+        sys.exit(1)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # Verify checksum if requested, downloading while PKGBUILD is rewritten
+        verification = None
+        if args.verify:
+            verification = executor.submit(verify_checksum, package_info['url'], package_info['sha256'])
+        
+        content = render_pkgbuild(content, args.version, package_info)
+        
+        if verification and not verification.result():
             sys.exit(1)
     
+    if args.dry_run:
+        print("✓ Dry run, PKGBUILD left unchanged")
+        return
+    
     # Update PKGBUILD
-    if not update_pkgbuild(args.version, package_info):
+    if not write_pkgbuild(content):
         sys.exit(1)
     
     print(f"✓ Successfully updated to version {args.version}")